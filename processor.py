@@ -1,14 +1,157 @@
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, List, Optional
+from itertools import chain, pairwise
+import asyncio
+import io
+import os
 import re
+import sys
 from dataclasses import dataclass
+from functools import lru_cache
 from loguru import logger
-import json
+import orjson
 import PyPDF2
 
-
-@dataclass
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+
+def _compile(pattern: str, flags: int = 0) -> Any:
+    """Compile pattern with RE2 when available, falling back to re.
+
+    RE2 matches in linear time but rejects lookarounds and backreferences;
+    such patterns are compiled with re instead. The result is either an
+    re.Pattern or an re2 pattern object, which share the methods used here.
+    """
+    if re2 is not None:
+        options = re2.Options()
+        options.case_sensitive = not flags & re.IGNORECASE
+        options.dot_nl = bool(flags & re.DOTALL)
+        options.log_errors = False
+        try:
+            return re2.compile(pattern, options)
+        except re2.error:
+            pass
+    return re.compile(pattern, flags)
+
+
+# PDF text normalization. These stay on re: raw PDF text can contain Unicode
+# whitespace that RE2's \s does not match.
+_WS_RE = re.compile(r'\s+')
+
+# Artifacts are fused into a single alternation so the text is rewritten in
+# one pass. Each group maps to its replacement by index. Unlike separate
+# passes, no artifact is rewritten into or out of another, so the output
+# differs when a URL runs into a token ("https://x/zT ype" keeps "ype") or
+# splits a print timestamp (which is then kept).
+_ARTIFACTS_RE = re.compile(
+    r'(Received\s+At:*)'  # Received At
+    r'|(Order\s+T\s*ype:*)'  # Order Type
+    r'|(Filled\s+at:+)'  # Filled at
+    r'|(T\s+ype)'  # Split "Type"
+    r'|(:+)'  # Repeated colons
+    r'|(https?://\S+)'  # URLs
+    r'|(\d{1,2}/\d{1,2}/\d{4},\s+\d{1,2}:\d{2})'  # Print timestamps
+)
+_ARTIFACT_REPLACEMENTS = ('', 'Received At:', 'Order Type:', 'Filled at:', 'Type', ':', '', '')
+
+# Email fields. These run on whitespace-normalized text, so RE2's ASCII-only
+# \s is safe. Every repetition is either bounded or delimited by a different
+# character class, so a failed match cannot backtrack super-linearly even on
+# the stdlib re engine.
+_ORDER_ID_RE = _compile(r'order\s*#\s*(\d+)', re.IGNORECASE)
+_DATE_RECEIVED_RE = _compile(
+    r'Received\s*At:?\s*([A-Za-z]+\s*\d{1,2}\s*\d?,?\s*\d{4}\s+\d{1,2}\s*\d?:?\d{1,2}\s*:?\d{1,2}\s*\d?\s*('
+    r'?:A\s?M|P\s?M)\s+E\s?[DS]T)'
+)
+_ORDER_TYPE_RE = _compile(r'Submitted\s+Order\s+T?ype:?\s*([^\n]+?)\s*(?:Fill|$)')
+_FILL_DETAILS_RE = _compile(r'Fill\s+Details(.*?)(?:If you have any questions|$)', re.DOTALL)
+_FILL_TIME_RE = _compile(r'Filled\s+at:\s*(.{0,64}?(?:A\s?M|P\s?M)\s+E\s?[DS]T)')
+# Start of a leg; the text up to the next one belongs to that leg
+_LEG_HEAD_RE = _compile(r'(?:Bought|Sold)\s+\d+\s+[A-Z]+')
+_LEG_RE = _compile(
+    r'(Bought|Sold)\s+'  # Action
+    r'(\d+)\s+'  # Quantity
+    r'([A-Z]+)'  # Symbol
+    r'(?:\s+\d+)*\s+'  # Optional additional numbers
+    r'(\d{1,2}/\d{1,2}/\d{2,4})\s+'  # Expiration date
+    r'(Put|Call)\s+'  # Option type
+    r'(\d+(?:\.\d*)?)\s+'  # Strike price
+    r'@\s+'  # @ separator
+    r'(\d+(?:\.\d*)?)'  # Fill price
+)
+
+# Date string normalization
+_AM_RE = _compile(r'(\d+:\d+:\d+)\s+A\s*M')
+_PM_RE = _compile(r'(\d+:\d+:\d+)\s+P\s*M')
+_TZ_RE = _compile(r'E\s*([DS]T)')
+_MONTH_DAY_RE = _compile(r'([A-Za-z]+)\s+(\d+)\s+(\d+)')
+
+# Well-formed datetime, e.g. "Nov 6, 2024 9:42:21 AM EDT"; case-insensitive
+# like strptime
+_DATETIME_RE = _compile(
+    r'([A-Za-z]{3,9}) (\d{1,2}), (\d{4}) (\d{1,2}):(\d{1,2}):(\d{1,2}) (AM|PM) E[DS]T',
+    re.IGNORECASE,
+)
+
+_MONTH_NAMES = (
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December',
+)
+_MONTHS = {
+    key: number
+    for number, name in enumerate(_MONTH_NAMES, start=1)
+    for key in (name.lower(), name[:3].lower())
+}
+
+
+def _replace_artifact(match: re.Match[str]) -> str:
+    """Return the replacement for whichever artifact group matched."""
+    # Every alternative is a group, so lastindex is always set
+    return _ARTIFACT_REPLACEMENTS[match.lastindex or 0]
+
+
+# The parsers below replace strptime, which rebuilds a regex from the format
+# on every call. They are memoized because the legs of one order usually
+# share a fill time and expiration.
+
+@lru_cache(maxsize=2048)
+def _parse_datetime_fast(date_str: str) -> Optional[datetime]:
+    """Parse a well-formed datetime string, or return None if it is not one."""
+    match = _DATETIME_RE.fullmatch(date_str)
+    if not match or (month := _MONTHS.get(match[1].lower())) is None:
+        return None
+    hour = int(match[4])
+    if not 1 <= hour <= 12:
+        raise ValueError(f"hour {hour} is not a valid 12-hour clock hour in {date_str!r}")
+    hour = hour % 12 + (12 if match[7].upper() == 'PM' else 0)
+    return datetime(int(match[3]), month, int(match[2]), hour, int(match[5]), int(match[6]))
+
+
+@lru_cache(maxsize=2048)
+def _parse_expiration(exp: str) -> datetime:
+    """Parse an M/D/YY expiration date; four-digit years are accepted too."""
+    month, day, year_str = exp.split('/')
+    year = int(year_str)
+    if len(year_str) == 2:
+        # Pivot like strptime's %y: 69-99 are 19xx, 00-68 are 20xx
+        year += 1900 if year >= 69 else 2000
+    elif len(year_str) != 4:
+        raise ValueError(f"expiration {exp!r} does not have a two- or four-digit year")
+    return datetime(year, int(month), int(day))
+
+
+@dataclass(slots=True, frozen=True)
 class TradeLeg:
     action: str
     quantity: int
@@ -20,7 +163,7 @@ class TradeLeg:
     fill_time: datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class Trade:
     order_id: str
     date_received: datetime
@@ -31,72 +174,56 @@ class Trade:
 class EmailParser:
     """Parser for TastyTrade confirmation emails."""
 
-    REGEX_PATTERNS = {
-        'order_id': r'order\s*#\s*(\d+)',
-        'date_received': r'Received\s*At:?\s*([A-Za-z]+\s*\d+\s*\d*,?\s*\d{4}\s+\d+\s*\d*:?\d+\s*:?\d+\s*\d*\s*('
-                         r'?:AM|PM)\s+E[DS]T)',
-        'order_type': r'Submitted\s+Order\s+T?ype:?\s*([^\n]+?)(?=\s*Fill|$)',
-        'legs': r'(?:(?:Bought|Sold)\s+\d+\s+[A-Z]+(?:\s+\d+)*\s+(?:\d{1,2}/\d{1,2}/\d{2,4}|\d{1,2}\s*\d*/\d{1,2}/\d{2,4})?\s*(?:Put|Call)?\s*\d+\.?\d*\s+@\s+\d+\.?\d*)',
-    }
-
-    LEG_PATTERN = (
-        r'(Bought|Sold)\s+'  # Action
-        r'(\d+)\s+'  # Quantity
-        r'([A-Z]+)'  # Symbol
-        r'(?:\s+\d+)*\s+'  # Optional additional numbers
-        r'(\d{1,2}/\d{1,2}/\d{2,4})\s+'  # Expiration date
-        r'(Put|Call)\s+'  # Option type
-        r'(\d+\.?\d*)\s+'  # Strike price
-        r'@\s+'  # @ separator
-        r'(\d+\.?\d*)'  # Fill price
-        r'(?:.*?Filled\s+at:\s*(.*?(?:AM|PM)\s+E[DS]T))?'  # Fill time
-    )
-
     @staticmethod
     def parse_datetime(date_str: str) -> datetime:
         """Convert date string to datetime object."""
         try:
-            # Normalize the date string
-            date_str = re.sub(r'(\d+:\d+:\d+)\s+A\s*M', r'\1 AM', date_str)
-            date_str = re.sub(r'(\d+:\d+:\d+)\s+P\s*M', r'\1 PM', date_str)
-            date_str = re.sub(r'E\s*([DS]T)', r'E\1', date_str)
-            date_str = re.sub(r'([A-Za-z]+)\s+(\d+)\s+(\d+)', r'\1 \2\3', date_str)
-            date_str = ' '.join(date_str.split())
-
-            try:
-                return datetime.strptime(date_str.strip(), "%b %d, %Y %I:%M:%S %p EDT")
-            except ValueError:
-                return datetime.strptime(date_str.strip(), "%b %d, %Y %I:%M:%S %p EST")
+            # Normalize the date string, unless it is already well-formed
+            # (the common case)
+            parsed = _parse_datetime_fast(date_str)
+            if parsed is None:
+                date_str = _AM_RE.sub(r'\1 AM', date_str)
+                date_str = _PM_RE.sub(r'\1 PM', date_str)
+                date_str = _TZ_RE.sub(r'E\1', date_str)
+                date_str = _MONTH_DAY_RE.sub(r'\1 \2\3', date_str)
+                date_str = _WS_RE.sub(' ', date_str).strip()
+                parsed = _parse_datetime_fast(date_str)
+
+            if parsed is None:
+                raise ValueError(f"time data {date_str!r} does not match 'Mon D, YYYY H:MM:SS AM EDT'")
+            return parsed
         except ValueError as e:
             logger.error(f"Error parsing date: {date_str}. Error: {e}")
             raise
 
-    def parse_leg(self, leg_text: str) -> TradeLeg:
-        """Parse individual trade leg details."""
-        match = re.search(self.LEG_PATTERN, leg_text, re.DOTALL)
+    def _parse_leg(self, text: str, start: int, end: int) -> TradeLeg:
+        """Parse the trade leg in text[start:end] without copying it out."""
+        match = _LEG_RE.match(text, start, end)
         if not match:
+            leg_text = text[start:end].strip()
             logger.error(f"Failed to parse leg: {leg_text}")
             raise ValueError(f"Invalid leg format: {leg_text}")
 
-        action, qty, symbol, exp, opt_type, strike, price, fill_time = match.groups()
+        action, qty, symbol, exp, opt_type, strike, price = match.groups()
 
-        if not fill_time:
-            if fill_time_match := re.search(
-                self.REGEX_PATTERNS['fill_time'], leg_text
-            ):
-                fill_time = fill_time_match[1]
-            else:
-                logger.error(f"No fill time found for leg: {leg_text}")
-                raise ValueError("No fill time found in leg text")
+        # Look for the fill time only between this leg and the next one, so
+        # the search stays linear in the leg text
+        fill_time_match = _FILL_TIME_RE.search(text, match.end(), end)
+        if not fill_time_match:
+            logger.error(f"No fill time found for leg: {text[start:end].strip()}")
+            raise ValueError("No fill time found in leg text")
+        fill_time = fill_time_match[1]
 
         # Handle stock trades (no expiration/option type/strike)
-        expiration = datetime.strptime(exp, "%m/%d/%y") if exp else None
+        expiration = _parse_expiration(exp) if exp else None
+        # Action, symbol and option type come from a handful of values, so
+        # intern them to share one string object across all legs
         return TradeLeg(
-            action=action,
+            action=sys.intern(action),
             quantity=int(qty),
-            symbol=symbol,
+            symbol=sys.intern(symbol),
             expiration=expiration,
-            option_type=opt_type or None,
+            option_type=sys.intern(opt_type) if opt_type else None,
             strike=float(strike) if strike else None,
             fill_price=float(price),
             fill_time=self.parse_datetime(fill_time)
@@ -106,60 +233,50 @@ class EmailParser:
         """Parse email content and return Trade object."""
         try:
             # Clean up the content
-            content = content.replace('\n', ' ').replace('\r', ' ')
-            content = ' '.join(content.split())
+            content = _WS_RE.sub(' ', content).strip()
 
             logger.debug("Cleaning up content...")
 
             # Extract basic trade information
-            order_id_match = re.search(self.REGEX_PATTERNS['order_id'], content, re.IGNORECASE)
+            order_id_match = _ORDER_ID_RE.search(content)
             if not order_id_match:
                 logger.error("Could not find order ID in content")
                 raise ValueError("No order ID found")
             order_id = order_id_match[1]
 
-            date_received_match = re.search(self.REGEX_PATTERNS['date_received'], content)
+            date_received_match = _DATE_RECEIVED_RE.search(content)
             if not date_received_match:
                 logger.error("Could not find date received in content")
-                logger.debug(f"Content: {content}")
+                logger.debug("Content: {}", content)
                 raise ValueError("No date received found")
             date_received = self.parse_datetime(date_received_match[1])
 
-            order_type_match = re.search(self.REGEX_PATTERNS['order_type'], content)
+            order_type_match = _ORDER_TYPE_RE.search(content)
             if not order_type_match:
                 logger.error("Could not find order type in content")
                 raise ValueError("No order type found")
             order_type = order_type_match[1].strip()
 
             # Extract legs with their associated fill times
-            leg_sections = []
-            fill_details_section = re.search(r'Fill\s+Details(.*?)(?:If you have any questions|$)', content, re.DOTALL)
-
-            if fill_details_section:
-                fill_content = fill_details_section.group(1)
-                # Split the fill details section by "Filled at:" to get individual legs
-                leg_parts = re.split(r'(?=(?:Bought|Sold)\s+\d+\s+[A-Z]+)', fill_content)
-                leg_parts = [part.strip() for part in leg_parts if part.strip()]
-
-                for part in leg_parts:
-                    if re.search(r'(Bought|Sold)', part):
-                        leg_sections.append(part)
-
-            if not leg_sections:
+            fill_details_section = _FILL_DETAILS_RE.search(content)
+            if not fill_details_section:
                 logger.error("No legs found in content")
-                logger.debug(f"Fill content: {fill_content if 'fill_content' in locals() else 'No fill content found'}")
                 raise ValueError("No trade legs found")
+            fill_content = fill_details_section.group(1)
 
             legs = []
-            for leg_section in leg_sections:
+            leg_starts = (leg_head.start() for leg_head in _LEG_HEAD_RE.finditer(fill_content))
+            for leg_start, leg_end in pairwise(chain(leg_starts, [len(fill_content)])):
                 try:
-                    leg = self.parse_leg(leg_section)
-                    legs.append(leg)
+                    legs.append(self._parse_leg(fill_content, leg_start, leg_end))
                 except ValueError as e:
-                    logger.warning(f"Failed to parse leg: {e}. Leg text: {leg_section}")
+                    leg_text = fill_content[leg_start:leg_end].strip()
+                    logger.warning(f"Failed to parse leg: {e}. Leg text: {leg_text}")
                     continue
 
             if not legs:
+                logger.error("No legs found in content")
+                logger.debug("Fill content: {}", fill_content)
                 raise ValueError("No valid legs parsed")
 
             return Trade(
@@ -181,14 +298,28 @@ class TradeProcessor:
         self.output_path = output_path
         self.parser = EmailParser()
 
+    @staticmethod
+    def _extract_text_pdfium(pdf_path: Path) -> str:
+        """Extract text with PDFium, which is much faster than PyPDF2."""
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            return "\n".join(page.get_textpage().get_text_range() for page in pdf) + "\n"
+        finally:
+            pdf.close()
+
+    @staticmethod
+    def _extract_text_pypdf2(pdf_path: Path) -> str:
+        """Extract text with PyPDF2, reading the whole file into memory first."""
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_path.read_bytes()), strict=False)
+        return "\n".join([page.extract_text() or "" for page in pdf_reader.pages]) + "\n"
+
     def extract_text_from_pdf(self, pdf_path: Path) -> str:
         """Extract text content from PDF file."""
         try:
-            text = ""
-            with pdf_path.open('rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+            if pdfium is not None:
+                text = self._extract_text_pdfium(pdf_path)
+            else:
+                text = self._extract_text_pypdf2(pdf_path)
             logger.debug("Extracted text from PDF.")
             return text
         except Exception as e:
@@ -197,23 +328,14 @@ class TradeProcessor:
 
     def preprocess_pdf_text(self, text: str) -> str:
         """Clean up text extracted from PDF."""
-        # Remove any weird spacing around common tokens
-        text = re.sub(r'Received\s+At', 'Received At:', text)
-        text = re.sub(r'Order\s+T\s*ype', 'Order Type:', text)
-        text = re.sub(r'Filled\s+at:+', 'Filled at:', text)  # Normalize multiple colons
-
-        # Fix specific PDF extraction artifacts
-        text = re.sub(r'T\s+ype', 'Type', text)
-        text = re.sub(r':+', ':', text)  # Replace multiple colons with single colon
+        # Fix spacing around common tokens, collapse repeated colons and
+        # remove URL/timestamp artifacts in a single pass
+        text = _ARTIFACTS_RE.sub(_replace_artifact, text)
 
         # Normalize whitespace
-        text = ' '.join(text.split())
-
-        # Remove any PDF artifacts
-        text = re.sub(r'https?://\S+', '', text)
-        text = re.sub(r'\d{1,2}/\d{1,2}/\d{4},\s+\d{1,2}:\d{2}', '', text)
+        text = _WS_RE.sub(' ', text).strip()
 
-        logger.debug(f"Preprocessed text: {text}")
+        logger.debug("Preprocessed text: {}", text)
         return text
 
     def process_email_file(self, file_path: Path) -> None:
@@ -230,30 +352,10 @@ class TradeProcessor:
             # Parse the content
             trade = self.parser.parse_email(content)
 
-            # Convert trade to dict for JSON storage
-            trade_dict = {
-                'order_id': trade.order_id,
-                'date_received': trade.date_received.isoformat(),
-                'order_type': trade.order_type,
-                'legs': [
-                    {
-                        'action': leg.action,
-                        'quantity': leg.quantity,
-                        'symbol': leg.symbol,
-                        'expiration': leg.expiration.isoformat(),
-                        'option_type': leg.option_type,
-                        'strike': leg.strike,
-                        'fill_price': leg.fill_price,
-                        'fill_time': leg.fill_time.isoformat()
-                    }
-                    for leg in trade.legs
-                ]
-            }
-
-            # Save to JSON file
+            # Save to JSON file; orjson serializes the dataclasses and
+            # datetimes (as ISO 8601) natively
             output_file = self.output_path / f"trade_{trade.order_id}.json"
-            with output_file.open('w') as f:
-                json.dump(trade_dict, f, indent=4)
+            output_file.write_bytes(orjson.dumps(trade, option=orjson.OPT_INDENT_2))
 
             logger.success(f"Successfully processed trade {trade.order_id}")
 
@@ -262,18 +364,88 @@ class TradeProcessor:
             raise
 
 
+def _process_one(pdf_file: Path, output_path: Path) -> Optional[str]:
+    """Process a single PDF in a worker process, returning the error if it failed."""
+    try:
+        TradeProcessor(output_path).process_email_file(pdf_file)
+    except Exception as e:
+        return str(e)
+    return None
+
+
+def _set_logger(parent_logger) -> None:
+    """Pool initializer: log through the parent's logger, whatever the start method."""
+    global logger
+    logger = parent_logger
+
+
+def _log_result(pdf_file: Path, error: Optional[str]) -> None:
+    """Log the outcome of processing one PDF."""
+    if error is None:
+        logger.success(f"Successfully processed {pdf_file.name}")
+    else:
+        logger.error(f"Failed to process {pdf_file.name}: {error}")
+
+
+def _new_executor(max_workers: Optional[int]) -> ProcessPoolExecutor:
+    """Start a process pool whose workers log through this process's logger."""
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=_set_logger, initargs=(logger,))
+
+
+async def _process_file(executor: ProcessPoolExecutor, pdf_file: Path, output_path: Path) -> bool:
+    """Process one PDF in the pool and log the outcome.
+
+    Returns False, without logging, if the pool broke before the file finished.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        error = await loop.run_in_executor(executor, _process_one, pdf_file, output_path)
+    except BrokenProcessPool:
+        return False
+    _log_result(pdf_file, error)
+    return True
+
+
+async def _process_file_alone(pdf_file: Path, output_path: Path, limit: asyncio.Semaphore) -> None:
+    """Retry a PDF in a pool of its own, so a worker crash can only be its fault."""
+    async with limit:
+        with _new_executor(1) as executor:
+            if not await _process_file(executor, pdf_file, output_path):
+                _log_result(pdf_file, "worker process died while processing it")
+
+
+async def _process_all(pdf_files: List[Path], output_path: Path) -> None:
+    """Process PDFs in a process pool, logging each result as soon as it completes."""
+    # Files are submitted one by one, so a slow file never holds a batch of
+    # others behind it and idle workers pick up the next file immediately
+    with _new_executor(os.cpu_count()) as executor:
+        finished = await asyncio.gather(*(_process_file(executor, pdf_file, output_path) for pdf_file in pdf_files))
+
+    # A dead worker (e.g. a crash in the PDF library or an OOM kill) breaks
+    # the whole pool and fails every file still running or queued in it,
+    # without saying which one killed it. Retry each of those in a fresh
+    # single-worker pool, so only the file that crashes again is reported.
+    unfinished = [pdf_file for pdf_file, done in zip(pdf_files, finished) if not done]
+    if unfinished:
+        logger.warning(f"A worker process died; retrying {len(unfinished)} unfinished files one per process")
+        limit = asyncio.Semaphore(os.cpu_count() or 1)
+        await asyncio.gather(*(_process_file_alone(pdf_file, output_path, limit) for pdf_file in unfinished))
+
+
 def main():
     """Main entry point for the script."""
-    logger.add("trades.log", rotation="500 MB")
+    # Worker processes receive this logger through the pool initializer, so
+    # every sink must be enqueued (and therefore picklable); that includes
+    # re-adding the default stderr sink
+    logger.remove()
+    logger.add(sys.stderr, enqueue=True)
+    logger.add("trades.log", rotation="500 MB", enqueue=True)
 
     # Setup paths
     data_dir = Path("data")
     output_path = Path("output")
     output_path.mkdir(exist_ok=True)
 
-    # Process all PDF files in data directory
-    processor = TradeProcessor(output_path)
-
     # Get all PDF files in the data directory
     pdf_files = list(data_dir.glob("*.pdf"))
 
@@ -283,15 +455,8 @@ def main():
 
     logger.info(f"Found {len(pdf_files)} PDF files to process")
 
-    # Process each PDF file
-    for pdf_file in pdf_files:
-        try:
-            logger.info(f"Processing file: {pdf_file.name}")
-            processor.process_email_file(pdf_file)
-            logger.success(f"Successfully processed {pdf_file.name}")
-        except Exception as e:
-            logger.error(f"Failed to process {pdf_file.name}: {str(e)}")
-            continue  # Continue with next file even if one fails
+    # Process the PDF files in parallel; a failing file does not stop the rest
+    asyncio.run(_process_all(pdf_files, output_path))
 
     logger.info("Completed processing all files")
 
@@ -0,0 +1,192 @@
+from datetime import datetime
+import asyncio
+import os
+import sys
+
+import pytest
+from loguru import logger
+
+import processor as processor_module
+from processor import EmailParser, Trade, TradeLeg, TradeProcessor
+
+
+HEADER = (
+    "Order # 123456789 https://trade.tastytrade.com/confirm?id=1\n"
+    "11/6/2024, 9:45 tastytrade\n"
+    "Received   At Nov 6, 2024 9:42:21 AM EDT\n"
+    "Submitted Order T ype:: Limit @ 1.10 Credit\n"
+    "Fill Details\n"
+)
+FOOTER = "If you have any questions please contact us\n"
+
+
+def parse(processor, fill_details):
+    return processor.parser.parse_email(processor.preprocess_pdf_text(HEADER + fill_details + FOOTER))
+
+
+@pytest.fixture
+def processor(tmp_path):
+    return TradeProcessor(tmp_path)
+
+
+@pytest.fixture
+def warnings():
+    messages = []
+    handler_id = logger.add(messages.append, level="WARNING", format="{message}")
+    yield messages
+    logger.remove(handler_id)
+
+
+def spx_put(action, strike, fill_price, fill_time):
+    return TradeLeg(
+        action=action,
+        quantity=1,
+        symbol="SPX",
+        expiration=datetime(2024, 11, 6),
+        option_type="Put",
+        strike=strike,
+        fill_price=fill_price,
+        fill_time=fill_time,
+    )
+
+
+def test_multi_leg_order(processor):
+    trade = parse(
+        processor,
+        "Sold 1 SPX 6 11/06/24 Put 5700 @ 6.45\n"
+        "Filled at:: Nov 6, 2024 9:43:54 AM EDT\n"
+        "Bought 1 SPX 6 11/06/24 Put 5690 @ 5.35\n"
+        "Filled at: Nov 6, 2024 9:43:55 AM EDT\n",
+    )
+
+    assert trade == Trade(
+        order_id="123456789",
+        date_received=datetime(2024, 11, 6, 9, 42, 21),
+        order_type="Limit @ 1.10 Credit",
+        legs=[
+            spx_put("Sold", 5700.0, 6.45, datetime(2024, 11, 6, 9, 43, 54)),
+            spx_put("Bought", 5690.0, 5.35, datetime(2024, 11, 6, 9, 43, 55)),
+        ],
+    )
+
+
+def test_split_time_tokens(processor):
+    trade = parse(
+        processor,
+        "Sold 1 SPX 6 11/06/24 Put 5700 @ 6.45\n"
+        "Filled at: Nov 6, 2024 1:43:54 P M E DT\n",
+    )
+
+    assert trade.legs == [spx_put("Sold", 5700.0, 6.45, datetime(2024, 11, 6, 13, 43, 54))]
+
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Order T ype:: Limit", "Order Type: Limit"),
+    ("Filled at:: Nov 6", "Filled at: Nov 6"),
+    ("https://x/y Received   At: Nov 6", "Received At: Nov 6"),
+    # Artifacts are matched once, against the original text
+    ("see https://x/zT ype here", "see ype here"),
+    ("11/6/2024, https://x/y 9:45 tastytrade", "11/6/2024, 9:45 tastytrade"),
+])
+def test_preprocess_pdf_text(processor, text, expected):
+    assert processor.preprocess_pdf_text(text) == expected
+
+def test_leg_without_fill_time_is_rejected(processor, warnings):
+    # The SPY leg can't be parsed; its fill time must not be attributed to
+    # the preceding SPX leg
+    trade = parse(
+        processor,
+        "Sold 1 SPX 6 11/06/24 Put 5700 @ 6.45\n"
+        "Bought 100 SPY @ 570\n"
+        "Filled at: Nov 6, 2024 9:43:54 AM EDT\n"
+        "Bought 1 SPX 6 11/06/24 Put 5690 @ 5.35\n"
+        "Filled at: Nov 6, 2024 9:43:55 AM EDT\n",
+    )
+
+    assert trade.legs == [spx_put("Bought", 5690.0, 5.35, datetime(2024, 11, 6, 9, 43, 55))]
+    assert any("No fill time found" in message and "SPX 6 11/06/24 Put 5700" in message
+               for message in warnings)
+
+
+def test_unparseable_leg_is_logged(processor, warnings):
+    trade = parse(
+        processor,
+        "Bought 100 SPY @ 570\n"
+        "Filled at: Nov 6, 2024 9:43:54 AM EDT\n"
+        "Bought 1 SPX 6 11/06/24 Put 5690 @ 5.35\n"
+        "Filled at: Nov 6, 2024 9:43:55 AM EDT\n",
+    )
+
+    assert [leg.symbol for leg in trade.legs] == ["SPX"]
+    assert any("Invalid leg format" in message and "Bought 100 SPY @ 570" in message
+               for message in warnings)
+
+
+def test_no_valid_legs(processor):
+    with pytest.raises(ValueError, match="No valid legs parsed"):
+        parse(processor, "Bought 100 SPY @ 570\nFilled at: Nov 6, 2024 9:43:54 AM EDT\n")
+
+
+@pytest.mark.parametrize("date_str, expected", [
+    ("Nov 6, 2024 9:42:21 AM EDT", datetime(2024, 11, 6, 9, 42, 21)),
+    ("Nov 6, 2024 12:42:21 AM EST", datetime(2024, 11, 6, 0, 42, 21)),
+    ("Nov 6, 2024 12:42:21 PM EDT", datetime(2024, 11, 6, 12, 42, 21)),
+    ("nov 6, 2024 9:42:21 am EDT", datetime(2024, 11, 6, 9, 42, 21)),
+    ("Nov 1 6, 2024 9:42:21 A M E DT", datetime(2024, 11, 16, 9, 42, 21)),
+])
+def test_parse_datetime(date_str, expected):
+    assert EmailParser.parse_datetime(date_str) == expected
+
+
+@pytest.mark.parametrize("date_str", [
+    "Nov 6, 2024 13:42:21 PM EDT",
+    "Nov 6, 2024 0:42:21 AM EDT",
+    "Foo 6, 2024 9:42:21 AM EDT",
+])
+def test_parse_datetime_rejects_invalid(date_str):
+    with pytest.raises(ValueError):
+        EmailParser.parse_datetime(date_str)
+
+
+
+@pytest.mark.parametrize("exp, expected", [
+    ("11/06/24", datetime(2024, 11, 6)),
+    ("1/6/68", datetime(2068, 1, 6)),
+    ("1/6/69", datetime(1969, 1, 6)),
+    ("11/06/2024", datetime(2024, 11, 6)),
+])
+def test_parse_expiration(exp, expected):
+    assert processor_module._parse_expiration(exp) == expected
+
+
+@pytest.mark.parametrize("exp", ["11/06/024", "11/06/999", "13/06/24"])
+def test_parse_expiration_rejects_invalid(exp):
+    with pytest.raises(ValueError):
+        processor_module._parse_expiration(exp)
+
+def _process_or_crash(pdf_file, output_path):
+    if pdf_file.name == "crash.pdf":
+        os._exit(1)
+    (output_path / f"{pdf_file.stem}.json").write_text("{}")
+    return None
+
+
+def test_worker_crash_fails_only_its_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(processor_module, "_process_one", _process_or_crash)
+    # Workers get the logger through the pool initializer, so as in main()
+    # every sink must be enqueued
+    errors = []
+    logger.remove()
+    handler_id = logger.add(errors.append, level="ERROR", format="{message}", enqueue=True)
+    pdf_files = [tmp_path / f"{i}.pdf" for i in range(16)]
+    try:
+        asyncio.run(processor_module._process_all([*pdf_files[:8], tmp_path / "crash.pdf", *pdf_files[8:]], tmp_path))
+    finally:
+        logger.remove(handler_id)
+        logger.add(sys.stderr)
+
+    assert sorted(path.name for path in tmp_path.glob("*.json")) == sorted(f"{i}.json" for i in range(16))
+    assert [message.strip() for message in errors] == [
+        "Failed to process crash.pdf: worker process died while processing it"
+    ]